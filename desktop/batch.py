@@ -0,0 +1,356 @@
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+from PIL import Image
+
+from export import FORMAT_EXTENSIONS, EncodeResult, EncodeTarget, save_image
+from pipeline import Pipeline, PipelineReport, Stage
+from watermark import WatermarkSpec, apply_watermark, render_stamp
+
+DEFAULT_MEMORY_BUDGET = 1024 * 1024 * 1024
+MIN_MEMORY_BUDGET = 64 * 1024 * 1024
+DECODE_STRIP_ROWS = 256
+BLEND_FRAMES = 4
+# One stack being decoded, one being blended and one being encoded.
+STACKS_IN_FLIGHT = 3
+
+
+def default_workers() -> tuple[int, int, int]:
+    cores = os.cpu_count() or 2
+    return max(1, cores // 4), max(1, cores // 2), max(1, cores // 4)
+
+
+def decode_image(path: str) -> tuple[str, Image.Image]:
+    with Image.open(path) as img:
+        return path, img.convert("RGBA")
+
+
+def watermark_batch(
+    paths: list[str],
+    spec: WatermarkSpec,
+    out_dir: str,
+    fmt: str = "JPEG",
+    quality: int = 95,
+    target: EncodeTarget | None = None,
+    workers: tuple[int, int, int] | None = None,
+    queue_size: int = 4,
+) -> PipelineReport:
+    decode_workers, render_workers, encode_workers = workers or default_workers()
+    ext = FORMAT_EXTENSIONS.get(fmt, "." + fmt.lower())
+
+    def render(item: tuple[str, Image.Image]) -> tuple[str, Image.Image]:
+        path, image = item
+        return path, apply_watermark(image, spec)
+
+    warnings: list[tuple[str, str]] = []
+
+    def encode(item: tuple[str, Image.Image]) -> str:
+        path, image = item
+        out_path = _output_path(path, out_dir, ext)
+        _note_missed_target(save_image(image, out_path, fmt, quality, target), out_path, warnings)
+        return out_path
+
+    pipeline = Pipeline(
+        [
+            Stage("decode", decode_image, decode_workers),
+            Stage("render", render, render_workers),
+            Stage("encode", encode, encode_workers),
+        ],
+        queue_size=queue_size,
+    )
+    report = pipeline.run(paths)
+    report.warnings = warnings
+    return report
+
+
+def _output_path(path: str, out_dir: str, ext: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(out_dir, f"{stem}_watermarked{ext}")
+
+
+def _note_missed_target(encoded: EncodeResult, out_path: str, warnings: list[tuple[str, str]]) -> None:
+    if not encoded.target_met:
+        warnings.append((out_path, f"{os.path.basename(out_path)} missed the encode target at quality {encoded.quality}"))
+
+
+def group_by_geometry(paths: list[str]) -> tuple[dict[tuple, list[str]], list[tuple[str, Exception]]]:
+    groups: dict[tuple, list[str]] = defaultdict(list)
+    errors: list[tuple[str, Exception]] = []
+    for path in paths:
+        # Opening only parses the header, so grouping costs no decodes.
+        try:
+            with Image.open(path) as img:
+                mode = "RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB"
+                groups[(img.size, mode)].append(path)
+        except Exception as exc:
+            errors.append((path, exc))
+    return groups, errors
+
+
+def _decode_into(path: str, mode: str, out: np.ndarray) -> None:
+    with Image.open(path) as img:
+        img = img.convert(mode)
+        # Copy across in strips; np.asarray on the whole frame would briefly
+        # hold two more frame-sized buffers outside the budget.
+        for top in range(0, img.height, DECODE_STRIP_ROWS):
+            bottom = min(img.height, top + DECODE_STRIP_ROWS)
+            out[top:bottom] = np.asarray(img.crop((0, top, img.width, bottom)))
+
+
+class _GroupStamp:
+    def __init__(self, spec: WatermarkSpec, size: tuple[int, int]) -> None:
+        self.size = size
+        self.box: tuple[int, int, int, int] | None = None
+        placed = render_stamp(spec, size)
+        if placed is None:
+            return
+
+        stamp, (x, y) = placed
+        width, height = size
+        left, top = max(0, x), max(0, y)
+        right, bottom = min(width, x + stamp.width), min(height, y + stamp.height)
+        if right <= left or bottom <= top:
+            return
+
+        # Only the part of the stamp that lands on the frame is kept, already
+        # premultiplied so blending a frame is one multiply-add.
+        clipped = stamp.crop((left - x, top - y, right - x, bottom - y))
+        pixels = np.asarray(clipped, dtype=np.float32)
+        self.alpha = pixels[..., 3:] / 255.0
+        self.inverse_alpha = 1.0 - self.alpha
+        self.premultiplied = pixels[..., :3] * self.alpha
+        self.box = (left, top, right, bottom)
+
+    @property
+    def nbytes(self) -> int:
+        if self.box is None:
+            return 0
+        return self.alpha.nbytes + self.inverse_alpha.nbytes + self.premultiplied.nbytes
+
+    def working_bytes(self, channels: int) -> int:
+        if self.box is None:
+            return 0
+        height, width = self.alpha.shape[:2]
+        return height * width * channels * np.dtype(np.float32).itemsize
+
+    def blend(self, stack: np.ndarray, frames_at_once: int) -> None:
+        if self.box is None:
+            return
+
+        # Sub-stacks of frames_at_once frames go through one float buffer, so
+        # the blend stays vectorised over frames while its float working set
+        # is fixed however deep the stack is.
+        left, top, right, bottom = self.box
+        depth = max(1, min(frames_at_once, len(stack)))
+        buffer = np.empty((depth,) + self.alpha.shape[:2] + stack.shape[-1:], dtype=np.float32)
+        for start in range(0, len(stack), depth):
+            regions = stack[start:start + depth, top:bottom, left:right]
+            work = buffer[:len(regions)]
+            np.copyto(work, regions)
+            if stack.shape[-1] == 3:
+                work *= self.inverse_alpha
+                work += self.premultiplied
+            else:
+                rgb, alpha = work[..., :3], work[..., 3:]
+                alpha /= 255.0
+                rgb *= alpha
+                rgb *= self.inverse_alpha
+                rgb += self.premultiplied
+                alpha *= self.inverse_alpha
+                alpha += self.alpha
+                np.divide(rgb, alpha, out=rgb, where=alpha > 0)
+                alpha *= 255.0
+            np.rint(work, out=work)
+            np.clip(work, 0, 255, out=work)
+            regions[...] = work
+
+
+class _MemoryGate:
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.in_use = 0
+        self.pinned = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, nbytes: int, pinned: bool = False) -> None:
+        # A request bigger than the whole budget is still let through once
+        # nothing but pinned (per-group) bytes is held, so one oversized frame
+        # or stamp cannot stall the batch.
+        with self._cond:
+            while self.in_use > self.pinned and self.in_use + nbytes > self.capacity:
+                self._cond.wait()
+            self.in_use += nbytes
+            if pinned:
+                self.pinned += nbytes
+
+    def release(self, nbytes: int, pinned: bool = False) -> None:
+        with self._cond:
+            self.in_use -= nbytes
+            if pinned:
+                self.pinned -= nbytes
+            self._cond.notify_all()
+
+
+@dataclass
+class _Group:
+    size: tuple[int, int]
+    mode: str
+    stamp: _GroupStamp | None
+    pending: int
+
+
+@dataclass
+class _Chunk:
+    paths: list[str]
+    group: _Group
+    frame_bytes: int
+    blend_frames: int
+    float_bytes: int
+    stack: np.ndarray | None = None
+    decoded: list[int] = field(default_factory=list)
+    errors: list[tuple[str, Exception]] = field(default_factory=list)
+
+    @property
+    def reserved_bytes(self) -> int:
+        return len(self.paths) * self.frame_bytes + self.blend_frames * self.float_bytes
+
+
+def _stack_depth(share: int, frame_bytes: int, float_bytes: int, frames: int) -> tuple[int, int]:
+    # Frames per stack and frames per blend sub-stack that fit in one share
+    # of the budget, counting the sub-stack's float buffer.
+    blend_frames = BLEND_FRAMES
+    depth = (share - blend_frames * float_bytes) // frame_bytes
+    if depth < blend_frames:
+        depth = share // (frame_bytes + float_bytes)
+        blend_frames = depth
+    depth = max(1, min(frames, depth))
+    return depth, max(1, min(blend_frames, depth))
+
+
+def watermark_batch_stacked(
+    paths: list[str],
+    spec: WatermarkSpec,
+    out_dir: str,
+    fmt: str = "JPEG",
+    quality: int = 95,
+    target: EncodeTarget | None = None,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    workers: tuple[int, int, int] | None = None,
+    queue_size: int = 1,
+) -> PipelineReport:
+    if spec.mode not in ("text", "logo"):
+        return watermark_batch(paths, spec, out_dir, fmt, quality, target, workers)
+
+    decode_workers, _, encode_workers = workers or default_workers()
+    ext = FORMAT_EXTENSIONS.get(fmt, "." + fmt.lower())
+    groups, errors = group_by_geometry(paths)
+
+    # Every chunk's frames are reserved against the budget before it enters
+    # the pipeline and released once they are written, so the stacks in
+    # flight never exceed it whatever the queue depths. A group's stamp is
+    # only built when the group starts and is pinned until its last stack is
+    # written.
+    gate = _MemoryGate(max(memory_budget, MIN_MEMORY_BUDGET))
+    lock = threading.Lock()
+    warnings: list[tuple[str, str]] = []
+
+    def admit():
+        # Waiting here shows up as decode starving for input, which is what
+        # a full budget looks like from inside the pipeline.
+        for ((width, height), mode), group_paths in groups.items():
+            stamp = _GroupStamp(spec, (width, height))
+            gate.acquire(stamp.nbytes, pinned=True)
+
+            frame_bytes = width * height * len(mode)
+            float_bytes = stamp.working_bytes(len(mode))
+            share = max(1, gate.capacity - stamp.nbytes) // STACKS_IN_FLIGHT
+            depth, blend_frames = _stack_depth(share, frame_bytes, float_bytes, len(group_paths))
+            offsets = range(0, len(group_paths), depth)
+            group = _Group((width, height), mode, stamp, len(offsets))
+            del stamp
+
+            for offset in offsets:
+                chunk = _Chunk(group_paths[offset:offset + depth], group, frame_bytes, blend_frames, float_bytes)
+                gate.acquire(chunk.reserved_bytes)
+                yield chunk
+
+    def finish(chunk: _Chunk) -> None:
+        chunk.stack = None
+        gate.release(chunk.reserved_bytes)
+        group = chunk.group
+        with lock:
+            errors.extend(chunk.errors)
+            group.pending -= 1
+            done = group.pending == 0
+        if done:
+            gate.release(group.stamp.nbytes, pinned=True)
+            group.stamp = None
+
+    def decode_frame(chunk: _Chunk, index: int) -> None:
+        try:
+            _decode_into(chunk.paths[index], chunk.group.mode, chunk.stack[index])
+            chunk.decoded.append(index)
+        except Exception as exc:
+            chunk.errors.append((chunk.paths[index], exc))
+
+    def decode(chunk: _Chunk) -> _Chunk:
+        try:
+            width, height = chunk.group.size
+            chunk.stack = np.empty((len(chunk.paths), height, width, len(chunk.group.mode)), dtype=np.uint8)
+        except BaseException:
+            finish(chunk)
+            raise
+        list(decode_pool.map(lambda index: decode_frame(chunk, index), range(len(chunk.paths))))
+        chunk.decoded.sort()
+        return chunk
+
+    def render(chunk: _Chunk) -> _Chunk:
+        try:
+            # Slots that failed to decode are blended too, which is cheaper
+            # than gathering the good frames into a copy.
+            chunk.group.stamp.blend(chunk.stack, chunk.blend_frames)
+        except Exception as exc:
+            chunk.errors.extend((chunk.paths[index], exc) for index in chunk.decoded)
+            chunk.decoded = []
+        return chunk
+
+    def encode_frame(chunk: _Chunk, index: int) -> str | None:
+        out_path = _output_path(chunk.paths[index], out_dir, ext)
+        try:
+            encoded = save_image(Image.fromarray(chunk.stack[index]), out_path, fmt, quality, target)
+            _note_missed_target(encoded, out_path, warnings)
+        except Exception as exc:
+            chunk.errors.append((chunk.paths[index], exc))
+            return None
+        return out_path
+
+    def encode(chunk: _Chunk) -> list[str]:
+        try:
+            written = encode_pool.map(lambda index: encode_frame(chunk, index), chunk.decoded)
+            return [out_path for out_path in written if out_path is not None]
+        finally:
+            finish(chunk)
+
+    # Each stage holds one stack at a time and fans its frames out over its
+    # own pool; the blend is already vectorised across the stack.
+    with ThreadPoolExecutor(decode_workers, thread_name_prefix="decode") as decode_pool, \
+            ThreadPoolExecutor(encode_workers, thread_name_prefix="encode") as encode_pool:
+        pipeline = Pipeline(
+            [
+                Stage("decode", decode, 1),
+                Stage("render", render, 1),
+                Stage("encode", encode, 1),
+            ],
+            queue_size=queue_size,
+        )
+        report = pipeline.run(admit())
+
+    # Stages hand whole chunks along; report per image like watermark_batch.
+    for chunk, exc in report.errors:
+        errors.extend((path, exc) for path in chunk.paths)
+    results = [out_path for written in report.results for out_path in written]
+    return PipelineReport(report.wall_seconds, report.stages, results, errors, warnings)
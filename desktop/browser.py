@@ -0,0 +1,151 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PIL import Image
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+PREVIEW_MAX_SIDE = 2560
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def image_nbytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+def decode_preview(path: str, max_side: int = PREVIEW_MAX_SIDE) -> Image.Image:
+    with Image.open(path) as img:
+        # Let JPEG decode straight to a reduced scale before the resample.
+        img.draft("RGB", (max_side, max_side))
+        preview = img.convert("RGBA")
+    preview.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    return preview
+
+
+class DecodedImageCache:
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._items: OrderedDict[str, Image.Image] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Image.Image | None:
+        with self._lock:
+            image = self._items.get(key)
+            if image is not None:
+                self._items.move_to_end(key)
+            return image
+
+    def put(self, key: str, image: Image.Image) -> None:
+        size = image_nbytes(image)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.current_bytes -= image_nbytes(old)
+            if size > self.max_bytes:
+                return
+            self._items[key] = image
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.current_bytes -= image_nbytes(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.current_bytes = 0
+
+
+class FolderBrowser:
+    def __init__(
+        self,
+        path: str,
+        cache: DecodedImageCache,
+        prefetch_radius: int = 1,
+    ) -> None:
+        self.folder = os.path.dirname(os.path.abspath(path))
+        self.files = sorted(
+            (
+                os.path.join(self.folder, name)
+                for name in os.listdir(self.folder)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            ),
+            key=lambda p: os.path.basename(p).lower(),
+        )
+        target = os.path.abspath(path)
+        self.index = self.files.index(target) if target in self.files else 0
+        self.cache = cache
+        self.prefetch_radius = prefetch_radius
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def current_path(self) -> str | None:
+        if not self.files:
+            return None
+        return self.files[self.index]
+
+    def step(self, delta: int) -> str | None:
+        if not self.files:
+            return None
+        self.index = (self.index + delta) % len(self.files)
+        return self.current_path
+
+    def _decode_into_cache(self, path: str) -> Image.Image:
+        try:
+            image = decode_preview(path)
+            self.cache.put(path, image)
+            return image
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+
+    def _schedule(self, path: str) -> Future | None:
+        if self.cache.get(path) is not None:
+            return None
+        with self._lock:
+            future = self._pending.get(path)
+            if future is None:
+                future = self._executor.submit(self._decode_into_cache, path)
+                self._pending[path] = future
+            return future
+
+    def preview(self, path: str) -> Image.Image:
+        image = self.cache.get(path)
+        if image is not None:
+            return image
+        # Join a prefetch that is already decoding this file instead of
+        # decoding twice, but never queue behind other prefetches: one still
+        # waiting for the worker is cancelled and the file decoded here.
+        with self._lock:
+            future = self._pending.get(path)
+            if future is not None and future.cancel():
+                self._pending.pop(path, None)
+                future = None
+        if future is not None:
+            return future.result()
+        image = decode_preview(path)
+        self.cache.put(path, image)
+        return image
+
+    def prefetch_neighbours(self) -> None:
+        if len(self.files) < 2:
+            return
+        wanted = []
+        for distance in range(1, self.prefetch_radius + 1):
+            for delta in (distance, -distance):
+                wanted.append(self.files[(self.index + delta) % len(self.files)])
+
+        # Drop queued prefetches the index has moved away from, so holding an
+        # arrow key does not pile up decodes nobody will look at.
+        with self._lock:
+            for path, future in list(self._pending.items()):
+                if path not in wanted and future.cancel():
+                    del self._pending[path]
+        for path in wanted:
+            self._schedule(path)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,284 @@
+import io
+import os
+from dataclasses import dataclass
+from typing import IO, Callable
+
+import numpy as np
+from PIL import Image, ImageChops
+
+from watermark import WatermarkSpec, apply_watermark
+
+FORMAT_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+
+
+@dataclass(frozen=True)
+class EncodeTarget:
+    max_bytes: int | None = None
+    min_ssim: float | None = None
+    min_psnr: float | None = None
+
+
+@dataclass(frozen=True)
+class EncodeResult:
+    quality: int
+    target_met: bool = True
+
+
+ENCODE_PRESETS: dict[str, EncodeTarget | None] = {
+    "Fixed quality (95)": None,
+    "Visually lossless (SSIM 0.98)": EncodeTarget(min_ssim=0.98),
+    "High fidelity (PSNR 40 dB)": EncodeTarget(min_psnr=40.0),
+    "Web (max 500 KB)": EncodeTarget(max_bytes=500_000),
+}
+
+
+@dataclass(frozen=True)
+class Rendition:
+    width: int
+    format: str = "JPEG"
+    quality: int = 90
+    target: EncodeTarget | None = None
+
+
+DEFAULT_RENDITIONS = (
+    Rendition(2560, "JPEG", 90),
+    Rendition(1280, "JPEG", 85),
+    Rendition(640, "WEBP", 80),
+)
+
+
+def flatten_for_jpeg(image: Image.Image) -> Image.Image:
+    if image.mode != "RGBA":
+        return image.convert("RGB")
+    bg = Image.new("RGB", image.size, (255, 255, 255))
+    bg.paste(image, mask=image.split()[3])
+    return bg
+
+
+SSIM_TILE = 256
+SSIM_MAX_TILES = 64
+
+
+def _box_mean(plane: np.ndarray, size: int = 8) -> np.ndarray:
+    padded = np.pad(plane.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+    total = (padded[size:, size:] - padded[:-size, size:]
+             - padded[size:, :-size] + padded[:-size, :-size])
+    return total / (size * size)
+
+
+def _ssim_map(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_x, mu_y = _box_mean(x), _box_mean(y)
+    var_x = _box_mean(x * x) - mu_x ** 2
+    var_y = _box_mean(y * y) - mu_y ** 2
+    cov = _box_mean(x * y) - mu_x * mu_y
+    return ((2 * mu_x * mu_y + c1) * (2 * cov + c2)) / ((mu_x ** 2 + mu_y ** 2 + c1) * (var_x + var_y + c2))
+
+
+def _tile_origins(length: int, count: int) -> list[int]:
+    if length <= SSIM_TILE:
+        return [0]
+    return sorted(set(int(v) for v in np.linspace(0, length - SSIM_TILE, count)))
+
+
+def ssim(reference: Image.Image, candidate: Image.Image) -> float:
+    # Always measured at full resolution: any downscale first would average
+    # away the 8x8 JPEG block error this is meant to catch. Large images are
+    # scored on an even grid of full-resolution tiles to bound the cost.
+    x_img, y_img = reference.convert("L"), candidate.convert("L")
+    width, height = x_img.size
+    if min(width, height) < 8:
+        return 1.0 if x_img.tobytes() == y_img.tobytes() else 0.0
+
+    if width * height <= SSIM_TILE * SSIM_TILE * SSIM_MAX_TILES:
+        boxes = [(0, 0, width, height)]
+    else:
+        per_axis = int(np.sqrt(SSIM_MAX_TILES))
+        boxes = [
+            (left, top, min(width, left + SSIM_TILE), min(height, top + SSIM_TILE))
+            for top in _tile_origins(height, per_axis)
+            for left in _tile_origins(width, per_axis)
+        ]
+
+    scores = []
+    for box in boxes:
+        x = np.asarray(x_img.crop(box), dtype=np.float64)
+        y = np.asarray(y_img.crop(box), dtype=np.float64)
+        scores.append(_ssim_map(x, y).mean())
+    return float(np.mean(scores))
+
+
+def psnr(reference: Image.Image, candidate: Image.Image) -> float:
+    diff = ImageChops.difference(reference.convert("RGB"), candidate.convert("RGB"))
+    counts = np.asarray(diff.histogram(), dtype=np.float64).reshape(3, 256).sum(axis=0)
+    mse = float((counts * np.arange(256) ** 2).sum() / (diff.width * diff.height * 3))
+    if mse == 0:
+        return float("inf")
+    return 10 * np.log10(255.0 ** 2 / mse)
+
+
+class _QualitySearch:
+    def __init__(self, image: Image.Image, fmt: str, target: EncodeTarget) -> None:
+        self.image = flatten_for_jpeg(image) if fmt == "JPEG" else image
+        self.fmt = fmt
+        self.target = target
+        self.encodes: dict[int, bytes] = {}
+
+    def encode(self, quality: int) -> bytes:
+        if quality not in self.encodes:
+            buf = io.BytesIO()
+            self.image.save(buf, format=self.fmt, quality=quality)
+            self.encodes[quality] = buf.getvalue()
+        return self.encodes[quality]
+
+    def too_big(self, quality: int, max_bytes: int) -> bool:
+        return len(self.encode(quality)) > max_bytes
+
+    def good_enough(self, quality: int) -> bool:
+        with Image.open(io.BytesIO(self.encode(quality))) as decoded:
+            decoded = decoded.convert(self.image.mode)
+            if self.target.min_ssim is not None and ssim(self.image, decoded) < self.target.min_ssim:
+                return False
+            if self.target.min_psnr is not None and psnr(self.image, decoded) < self.target.min_psnr:
+                return False
+        return True
+
+
+def _first_true(lo: int, hi: int, test: Callable[[int], bool]) -> int:
+    # Smallest q in [lo, hi] for a test that flips from False to True as q
+    # rises; hi + 1 when it never does.
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if test(mid):
+            hi = mid - 1
+        else:
+            lo = mid + 1
+    return lo
+
+
+def _windowed_first_true(estimate: int, window: int, test: Callable[[int], bool]) -> int:
+    lo, hi = max(1, estimate - window), min(100, estimate + window)
+    # Only fall back to the full range when the probe estimate was off by more
+    # than the window, which is checked with one encode at each edge.
+    if lo > 1 and test(lo):
+        return _first_true(1, lo - 1, test)
+    if hi < 100 and not test(hi):
+        return _first_true(hi + 1, 100, test)
+    return _first_true(lo, hi, test)
+
+
+def choose_quality(
+    image: Image.Image,
+    fmt: str,
+    target: EncodeTarget,
+    probe_size: int = 512,
+    window: int = 6,
+) -> tuple[int, bytes, bool]:
+    full = _QualitySearch(image, fmt, target)
+
+    shrink = min(1.0, probe_size / max(image.size))
+    probe_dims = (max(1, int(image.width * shrink)), max(1, int(image.height * shrink)))
+    probe_image = image.resize(probe_dims, Image.Resampling.BOX)
+    probe = _QualitySearch(probe_image, fmt, target)
+    area_ratio = (probe_image.width * probe_image.height) / (image.width * image.height)
+
+    # Narrow the range on the cheap probe, then run a short windowed search
+    # at full size. Byte budgets are scaled to the probe by area. A target
+    # that cannot be reached still gets the closest quality, flagged unmet.
+    met = True
+    limits: list[int] = []
+    if target.min_ssim is not None or target.min_psnr is not None:
+        estimate = min(100, _first_true(1, 100, probe.good_enough))
+        floor = _windowed_first_true(estimate, window, full.good_enough)
+        met = floor <= 100
+        limits.append(min(100, floor))
+    # A quality floor that already fits the byte budget needs no size search.
+    if target.max_bytes is not None and not (limits and not full.too_big(limits[0], target.max_bytes)):
+        probe_budget = int(target.max_bytes * area_ratio)
+        estimate = max(1, _first_true(1, 100, lambda q: probe.too_big(q, probe_budget)) - 1)
+        first_over = _windowed_first_true(estimate + 1, window, lambda q: full.too_big(q, target.max_bytes))
+        # Either even q=1 is too big, or the byte cap forced the quality
+        # below the fidelity floor; the cap wins, but the target is missed.
+        met = first_over > 1 and not limits
+        limits.append(max(1, first_over - 1))
+
+    quality = min(limits) if limits else 95
+    return quality, full.encode(quality), met
+
+
+def save_image(
+    image: Image.Image,
+    fp: str | IO[bytes],
+    fmt: str,
+    quality: int = 95,
+    target: EncodeTarget | None = None,
+) -> EncodeResult:
+    if target is not None and fmt in ("JPEG", "WEBP"):
+        quality, data, met = choose_quality(image, fmt, target)
+        if isinstance(fp, str):
+            with open(fp, "wb") as f:
+                f.write(data)
+        else:
+            fp.write(data)
+        return EncodeResult(quality, met)
+    if fmt == "JPEG":
+        flatten_for_jpeg(image).save(fp, format="JPEG", quality=quality)
+    elif fmt == "WEBP":
+        image.save(fp, format="WEBP", quality=quality)
+    else:
+        image.save(fp, format=fmt)
+    return EncodeResult(quality)
+
+
+def build_downscale_chain(image: Image.Image, widths: list[int]) -> dict[int, Image.Image]:
+    # Each size is resampled from the next larger one rather than from the
+    # original, so the expensive full-resolution pass happens only once.
+    chain: dict[int, Image.Image] = {}
+    current = image
+    for width in sorted(set(widths), reverse=True):
+        if width < current.width:
+            height = max(1, round(image.height * width / image.width))
+            current = current.resize((width, height), Image.Resampling.LANCZOS)
+        chain[width] = current
+    return chain
+
+
+def export_renditions(
+    image: Image.Image,
+    spec: WatermarkSpec,
+    renditions: list[Rendition],
+    out_dir: str,
+    stem: str,
+) -> tuple[list[str], list[Rendition], list[str]]:
+    # Renditions are never upscaled; ones wider than the source are skipped
+    # and handed back so the caller can say so, as are the files whose encode
+    # target could not be met.
+    fitting = [r for r in renditions if r.width <= image.width]
+    skipped = [r for r in renditions if r.width > image.width]
+    chain = build_downscale_chain(image, [r.width for r in fitting])
+
+    # Stamp at each rendition's own resolution so text is rasterised sharp
+    # and keeps the same proportion of the short side as the full image.
+    stamped: dict[int, Image.Image] = {}
+    paths: list[str] = []
+    missed: list[str] = []
+    for rendition in fitting:
+        if rendition.width not in stamped:
+            stamped[rendition.width] = apply_watermark(chain[rendition.width], spec)
+        result = stamped[rendition.width]
+
+        ext = FORMAT_EXTENSIONS.get(rendition.format, "." + rendition.format.lower())
+        name = f"{stem}_watermarked_{rendition.width}w"
+        path = os.path.join(out_dir, f"{name}{ext}")
+        if path in paths:
+            name = f"{name}_q{rendition.quality}"
+            path = os.path.join(out_dir, f"{name}{ext}")
+        counter = 2
+        while path in paths:
+            path = os.path.join(out_dir, f"{name}_{counter}{ext}")
+            counter += 1
+        encoded = save_image(result, path, rendition.format, rendition.quality, rendition.target)
+        paths.append(path)
+        if not encoded.target_met:
+            missed.append(path)
+    return paths, skipped, missed
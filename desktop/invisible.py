@@ -0,0 +1,183 @@
+import binascii
+import hashlib
+import struct
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+from PIL import Image
+
+BLOCK = 8
+CANONICAL_SIZE = (512, 512)
+DEFAULT_KEY = "watermark-studio"
+DEFAULT_STRENGTH = 4.0
+MAX_PUSH = 3.0
+
+# Mid-frequency band of each 8x8 block (u + v in 3..4). Low enough to survive
+# JPEG quantisation and resampling, high enough to stay out of flat gradients.
+MID_BAND = [(u, v) for u in range(BLOCK) for v in range(BLOCK) if 3 <= u + v <= 4]
+BAND_U = np.array([u for u, _ in MID_BAND])
+BAND_V = np.array([v for _, v in MID_BAND])
+
+PAYLOAD_BITS = 80
+
+
+@dataclass(frozen=True)
+class WatermarkPayload:
+    owner_id: int
+    timestamp: int
+
+
+@dataclass(frozen=True)
+class DetectionResult:
+    path: str
+    payload: WatermarkPayload | None = None
+    error: Exception | None = None
+
+
+def _dct_matrix(n: int = BLOCK) -> np.ndarray:
+    k = np.arange(n)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    matrix *= np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+DCT = _dct_matrix()
+
+
+def _to_blocks(plane: np.ndarray) -> np.ndarray:
+    *lead, h, w = plane.shape
+    blocks = plane.reshape(*lead, h // BLOCK, BLOCK, w // BLOCK, BLOCK)
+    return np.swapaxes(blocks, -3, -2).reshape(*lead, -1, BLOCK, BLOCK)
+
+
+def _from_blocks(blocks: np.ndarray, h: int, w: int) -> np.ndarray:
+    *lead, _, _, _ = blocks.shape
+    grid = blocks.reshape(*lead, h // BLOCK, w // BLOCK, BLOCK, BLOCK)
+    return np.swapaxes(grid, -3, -2).reshape(*lead, h, w)
+
+
+def _band_coefficients(luma: np.ndarray) -> np.ndarray:
+    coefficients = DCT @ _to_blocks(luma) @ DCT.T
+    return coefficients[..., BAND_U, BAND_V]
+
+
+@lru_cache(maxsize=8)
+def _key_material(key: str, n_blocks: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    seed = int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big")
+    rng = np.random.default_rng(seed)
+    bit_index = rng.permutation(n_blocks) % PAYLOAD_BITS
+    chips = rng.choice(np.array([-1.0, 1.0], dtype=np.float32), size=(n_blocks, len(MID_BAND)))
+    assignment = np.eye(PAYLOAD_BITS, dtype=np.float32)[bit_index]
+    return bit_index, chips, assignment
+
+
+def _encode_payload(payload: WatermarkPayload) -> np.ndarray:
+    data = struct.pack(">II", payload.owner_id & 0xFFFFFFFF, payload.timestamp & 0xFFFFFFFF)
+    data += struct.pack(">H", binascii.crc_hqx(data, 0))
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+
+def _decode_payload(bits: np.ndarray) -> WatermarkPayload | None:
+    data = np.packbits(bits.astype(np.uint8)).tobytes()
+    body, (crc,) = data[:8], struct.unpack(">H", data[8:10])
+    if binascii.crc_hqx(body, 0) != crc:
+        return None
+    owner_id, timestamp = struct.unpack(">II", body)
+    return WatermarkPayload(owner_id, timestamp)
+
+
+def _canonical_luma(image: Image.Image) -> np.ndarray:
+    luma = image.convert("L").resize(CANONICAL_SIZE, Image.Resampling.BILINEAR)
+    return np.asarray(luma, dtype=np.float32)
+
+
+def embed_invisible_watermark(
+    image: Image.Image,
+    payload: WatermarkPayload,
+    key: str = DEFAULT_KEY,
+    strength: float = DEFAULT_STRENGTH,
+) -> Image.Image:
+    # The mark lives on a fixed canonical grid and is upsampled onto the image,
+    # so detection only has to resample back to that grid to find the blocks
+    # again after the photo has been resized.
+    rgba = image.convert("RGBA")
+    canonical = _canonical_luma(rgba)
+    h, w = canonical.shape
+
+    band = _band_coefficients(canonical)
+    bit_index, chips, _ = _key_material(key, band.shape[0])
+    signs = _encode_payload(payload).astype(np.float32)[bit_index] * 2.0 - 1.0
+
+    # Informed embedding: push each block's projection onto its chip sequence
+    # just past the margin, leaving blocks that already agree untouched. Busy
+    # blocks that disagree strongly are capped and left to the other votes.
+    projection = (band * chips).mean(axis=1)
+    push = np.clip(strength - signs * projection, 0.0, strength * MAX_PUSH) * signs
+
+    delta_coefficients = np.zeros((band.shape[0], BLOCK, BLOCK), dtype=np.float32)
+    delta_coefficients[:, BAND_U, BAND_V] = push[:, None] * chips
+    delta = _from_blocks(DCT.T @ delta_coefficients @ DCT, h, w).astype(np.float32)
+
+    delta_image = Image.fromarray(delta).resize(rgba.size, Image.Resampling.BILINEAR)
+    delta_full = np.asarray(delta_image, dtype=np.float32)[..., None]
+
+    pixels = np.asarray(rgba, dtype=np.float32)
+    marked = pixels[..., :3] + delta_full
+    out = np.concatenate([np.clip(np.rint(marked), 0, 255), pixels[..., 3:]], axis=2)
+    return Image.fromarray(out.astype(np.uint8))
+
+
+def _detect_stack(lumas: np.ndarray, key: str) -> list[WatermarkPayload | None]:
+    band = _band_coefficients(lumas)
+    _, chips, assignment = _key_material(key, band.shape[-2])
+    projection = (band * chips).mean(axis=-1)
+
+    # Sum every block's vote into its bit for all images at once.
+    soft = projection @ assignment
+    return [_decode_payload(row > 0) for row in soft]
+
+
+def detect_invisible_watermark(image: Image.Image, key: str = DEFAULT_KEY) -> WatermarkPayload | None:
+    return _detect_stack(_canonical_luma(image)[None], key)[0]
+
+
+def _load_canonical_luma(path: str) -> np.ndarray:
+    with Image.open(path) as img:
+        # JPEG can decode straight to a reduced scale, which is all the
+        # canonical grid needs.
+        img.draft("L", (CANONICAL_SIZE[0] * 2, CANONICAL_SIZE[1] * 2))
+        return _canonical_luma(img)
+
+
+def detect_invisible_watermarks(
+    paths: Iterable[str],
+    key: str = DEFAULT_KEY,
+    chunk_size: int = 64,
+) -> list[DetectionResult]:
+    paths = list(paths)
+    results: list[DetectionResult | None] = [None] * len(paths)
+    chunk_indices: list[int] = []
+    chunk_lumas: list[np.ndarray] = []
+
+    def flush() -> None:
+        if chunk_lumas:
+            found = _detect_stack(np.stack(chunk_lumas), key)
+            for index, payload in zip(chunk_indices, found):
+                results[index] = DetectionResult(paths[index], payload)
+            chunk_indices.clear()
+            chunk_lumas.clear()
+
+    for index, path in enumerate(paths):
+        try:
+            chunk_lumas.append(_load_canonical_luma(path))
+        except Exception as exc:
+            results[index] = DetectionResult(path, error=exc)
+            continue
+        chunk_indices.append(index)
+        if len(chunk_lumas) >= chunk_size:
+            flush()
+    flush()
+    return results
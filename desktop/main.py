@@ -1,7 +1,18 @@
 import os
+import threading
+import time
+from dataclasses import replace
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox, colorchooser
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+from PIL import Image, ImageTk
+
+from batch import watermark_batch_stacked
+from browser import DecodedImageCache, FolderBrowser
+from export import DEFAULT_RENDITIONS, ENCODE_PRESETS, export_renditions, save_image
+from invisible import detect_invisible_watermarks
+from sweep import DEFAULT_SWEEP_GRID, MAX_SWEEP_SAMPLES, render_contact_sheet
+from tileview import TileView
+from watermark import POSITIONS, WatermarkSpec, apply_watermark
 
 try:
     from ctypes import windll
@@ -23,6 +34,7 @@ def get_system_font() -> str | None:
             return path
     return None
 
+
 class WatermarkApp:
     def __init__(self, root: tk.Tk) -> None:
         self.root = root
@@ -33,6 +45,9 @@ class WatermarkApp:
         self._set_app_icon()
 
         self._resize_timer = None
+        self._job_thread: threading.Thread | None = None
+        self._job_outcome = None
+        self._job_done = None
 
         self.colors = {
             "bg_main": "#1e1e1e",
@@ -49,17 +64,23 @@ class WatermarkApp:
 
         self.base_image: Image.Image | None = None
         self.original_filename: str | None = None
+        self.base_path: str | None = None
+        self.base_is_preview: bool = False
+        self._full_res_loading: str | None = None
+        self.preview_cache = DecodedImageCache()
+        self.browser: FolderBrowser | None = None
         self.watermark_logo: Image.Image | None = None
         self.processed_image: Image.Image | None = None
-        self.tk_image_ref: ImageTk.PhotoImage | None = None
         self.font_path: str | None = get_system_font()
         self.text_color: tuple[int, int, int] = (255, 255, 255)
 
         self.mode_var = tk.StringVar(value="text")
         self.text_content = tk.StringVar(value="© Copyright")
+        self.owner_id_var = tk.StringVar(value="1")
         self.position_var = tk.StringVar(value="Bottom Right")
         self.size_var = tk.DoubleVar(value=5.0)
         self.opacity_var = tk.DoubleVar(value=90.0)
+        self.encode_preset_var = tk.StringVar(value=next(iter(ENCODE_PRESETS)))
 
         self._setup_styles()
         self._build_layout()
@@ -67,6 +88,8 @@ class WatermarkApp:
         self._toggle_input_mode()
 
         self.root.bind("<Configure>", self._on_resize_debounced)
+        self.root.bind("<Left>", lambda e: self._on_arrow_key(e, -1))
+        self.root.bind("<Right>", lambda e: self._on_arrow_key(e, 1))
 
     def _set_app_icon(self) -> None:
         icon_path = "logo-icon.png"
@@ -204,7 +227,27 @@ class WatermarkApp:
             text="✕ Remove Image",
             style="Danger.TButton",
             command=self.remove_base_image,
-        ).pack(fill="x", pady=(0, 20))
+        ).pack(fill="x", pady=(0, 10))
+
+        nav_frame = ttk.Frame(sidebar)
+        nav_frame.pack(fill="x", pady=(0, 20))
+
+        ttk.Button(
+            nav_frame,
+            text="◀",
+            style="Control.TButton",
+            command=lambda: self.show_adjacent(-1),
+        ).pack(side="left")
+
+        self.lbl_browse_status = ttk.Label(nav_frame, text="", style="TLabel")
+        self.lbl_browse_status.pack(side="left", fill="x", expand=True, padx=5)
+
+        ttk.Button(
+            nav_frame,
+            text="▶",
+            style="Control.TButton",
+            command=lambda: self.show_adjacent(1),
+        ).pack(side="right")
 
         ttk.Label(sidebar, text="WATERMARK TYPE", style="Header.TLabel").pack(anchor="w", pady=(0, 10))
 
@@ -212,6 +255,7 @@ class WatermarkApp:
         toggle_frame.pack(fill="x", pady=(0, 20))
         toggle_frame.columnconfigure(0, weight=1)
         toggle_frame.columnconfigure(1, weight=1)
+        toggle_frame.columnconfigure(2, weight=1)
 
         self.btn_text_mode = ttk.Button(
             toggle_frame,
@@ -225,7 +269,14 @@ class WatermarkApp:
             text="Logo Mode",
             command=lambda: self._set_mode("logo")
         )
-        self.btn_logo_mode.grid(row=0, column=1, sticky="ew", padx=(2, 0))
+        self.btn_logo_mode.grid(row=0, column=1, sticky="ew", padx=2)
+
+        self.btn_invisible_mode = ttk.Button(
+            toggle_frame,
+            text="Invisible",
+            command=lambda: self._set_mode("invisible")
+        )
+        self.btn_invisible_mode.grid(row=0, column=2, sticky="ew", padx=(2, 0))
 
         self.content_container = ttk.Frame(sidebar)
         self.content_container.pack(fill="x", pady=(0, 20))
@@ -260,14 +311,32 @@ class WatermarkApp:
             command=self.load_logo,
         ).pack(fill="x", ipady=5)
 
+        self.invisible_tools = ttk.Frame(self.content_container, style="ToolGroup.TFrame", padding=15)
+        ttk.Label(self.invisible_tools, text="OWNER ID", style="Sub.TLabel").pack(anchor="w", pady=(0, 5))
+
+        self.entry_owner_id = ttk.Entry(
+            self.invisible_tools,
+            textvariable=self.owner_id_var,
+            style="Modern.TEntry",
+            font=("Segoe UI", 11)
+        )
+        self.entry_owner_id.bind("<KeyRelease>", lambda e: self.refresh_preview())
+        self.entry_owner_id.pack(fill="x", pady=(0, 10), ipady=8)
+
+        ttk.Button(
+            self.invisible_tools,
+            text="🔍 Detect in Files",
+            style="ToggleOff.TButton",
+            command=self.detect_invisible,
+        ).pack(fill="x", ipady=3)
+
         ttk.Label(sidebar, text="SETTINGS", style="Header.TLabel").pack(anchor="w", pady=(0, 10))
 
         ttk.Label(sidebar, text="Position").pack(anchor="w")
-        pos_opts = ["Bottom Right", "Bottom Left", "Top Right", "Top Left", "Center"]
         combo = ttk.Combobox(
             sidebar,
             textvariable=self.position_var,
-            values=pos_opts,
+            values=POSITIONS,
             state="readonly",
             font=("Segoe UI", 10)
         )
@@ -277,6 +346,15 @@ class WatermarkApp:
         self._create_smart_slider(sidebar, "Size Scale (%)", self.size_var, 1, 100)
         self._create_smart_slider(sidebar, "Opacity (%)", self.opacity_var, 0, 100)
 
+        ttk.Label(sidebar, text="JPEG / WebP Quality").pack(anchor="w")
+        ttk.Combobox(
+            sidebar,
+            textvariable=self.encode_preset_var,
+            values=list(ENCODE_PRESETS),
+            state="readonly",
+            font=("Segoe UI", 10)
+        ).pack(fill="x", pady=(5, 15), ipady=3)
+
         ttk.Frame(sidebar).pack(fill="both", expand=True)
 
         ttk.Button(
@@ -284,7 +362,28 @@ class WatermarkApp:
             text="💾 Save Result",
             style="Action.TButton",
             command=self.save_result,
-        ).pack(fill="x", pady=10, ipady=5)
+        ).pack(fill="x", pady=(10, 5), ipady=5)
+
+        ttk.Button(
+            sidebar,
+            text="🗂 Export Renditions",
+            style="ToggleOff.TButton",
+            command=self.export_renditions,
+        ).pack(fill="x", pady=(0, 5), ipady=3)
+
+        ttk.Button(
+            sidebar,
+            text="📁 Batch Watermark",
+            style="ToggleOff.TButton",
+            command=self.run_batch,
+        ).pack(fill="x", pady=(0, 5), ipady=3)
+
+        ttk.Button(
+            sidebar,
+            text="🧪 Style Sweep",
+            style="ToggleOff.TButton",
+            command=self.run_style_sweep,
+        ).pack(fill="x", pady=(0, 10), ipady=3)
 
         display_area = ttk.Frame(self.root, style="Main.TFrame")
         display_area.pack(side="right", fill="both", expand=True)
@@ -295,6 +394,7 @@ class WatermarkApp:
             highlightthickness=0,
         )
         self.canvas.pack(fill="both", expand=True, padx=20, pady=20)
+        self.view = TileView(self.canvas, on_zoom=self._on_view_zoom)
 
         self._draw_canvas_placeholder()
 
@@ -352,6 +452,7 @@ class WatermarkApp:
         btn_plus.pack(side="right")
 
     def _draw_canvas_placeholder(self) -> None:
+        self.view.clear()
         self.canvas.delete("all")
         self.canvas.update_idletasks()
         w = self.canvas.winfo_width()
@@ -375,20 +476,23 @@ class WatermarkApp:
 
     def _update_toggle_visuals(self) -> None:
         mode = self.mode_var.get()
-        if mode == "text":
-            self.btn_text_mode.configure(style="ToggleOn.TButton")
-            self.btn_logo_mode.configure(style="ToggleOff.TButton")
-        else:
-            self.btn_text_mode.configure(style="ToggleOff.TButton")
-            self.btn_logo_mode.configure(style="ToggleOn.TButton")
+        buttons = {
+            "text": self.btn_text_mode,
+            "logo": self.btn_logo_mode,
+            "invisible": self.btn_invisible_mode,
+        }
+        for name, button in buttons.items():
+            button.configure(style="ToggleOn.TButton" if name == mode else "ToggleOff.TButton")
 
     def _toggle_input_mode(self) -> None:
-        if self.mode_var.get() == "text":
-            self.logo_tools.pack_forget()
-            self.text_tools.pack(fill="x")
-        else:
-            self.text_tools.pack_forget()
-            self.logo_tools.pack(fill="x")
+        tools = {
+            "text": self.text_tools,
+            "logo": self.logo_tools,
+            "invisible": self.invisible_tools,
+        }
+        for frame in tools.values():
+            frame.pack_forget()
+        tools[self.mode_var.get()].pack(fill="x")
         self.refresh_preview()
 
     def pick_color(self) -> None:
@@ -406,9 +510,97 @@ class WatermarkApp:
         try:
             self.base_image = Image.open(path).convert("RGBA")
             self.original_filename = os.path.basename(path)
+            self.base_path = path
+            self.base_is_preview = False
+            self._open_folder(path)
+            self.refresh_preview()
+        except Exception as exc:
+            messagebox.showerror("Error", f"Failed to load image:\n{exc}")
+
+    def _open_folder(self, path: str) -> None:
+        if self.browser:
+            self.browser.close()
+        self.browser = FolderBrowser(path, self.preview_cache)
+        self.browser.prefetch_neighbours()
+        self._update_browse_status()
+
+    def _update_browse_status(self) -> None:
+        if not self.browser or not self.browser.files:
+            self.lbl_browse_status.config(text="")
+            return
+        text = f"{self.browser.index + 1} / {len(self.browser.files)}"
+        if self._full_res_loading:
+            text += " · loading full resolution"
+        elif self.base_is_preview:
+            text += " · preview"
+        self.lbl_browse_status.config(text=text, anchor="center")
+
+    def _on_arrow_key(self, event: tk.Event, delta: int) -> None:
+        if isinstance(event.widget, (tk.Entry, ttk.Entry, ttk.Combobox, tk.Scale, ttk.Scale)):
+            return
+        self.show_adjacent(delta)
+
+    def show_adjacent(self, delta: int) -> None:
+        if not self.browser:
+            return
+        path = self.browser.step(delta)
+        if not path:
+            return
+        try:
+            self.base_image = self.browser.preview(path)
+            self.original_filename = os.path.basename(path)
+            self.base_path = path
+            self.base_is_preview = True
             self.refresh_preview()
         except Exception as exc:
             messagebox.showerror("Error", f"Failed to load image:\n{exc}")
+        self._update_browse_status()
+        self.browser.prefetch_neighbours()
+
+    def _on_view_zoom(self, zoom: float) -> None:
+        # Past 100% a browsing preview would only magnify preview pixels, so
+        # decode the real file in the background and swap it in.
+        if not self.base_is_preview or zoom <= 1.0 or self._full_res_loading:
+            return
+
+        path = self.base_path
+        loaded: dict[str, object] = {}
+
+        def load() -> None:
+            try:
+                with Image.open(path) as img:
+                    loaded["image"] = img.convert("RGBA")
+            except Exception as exc:
+                loaded["error"] = exc
+
+        def poll() -> None:
+            if thread.is_alive():
+                self.root.after(100, poll)
+                return
+            self._full_res_loading = None
+            if self.base_path == path and self.base_is_preview:
+                if "error" in loaded:
+                    messagebox.showerror("Error", f"Failed to load image:\n{loaded['error']}")
+                else:
+                    self.base_image = loaded["image"]
+                    self.base_is_preview = False
+                    self.processed_image = apply_watermark(self.base_image, self._current_spec())
+                    self.view.show(self.processed_image, keep_view=True)
+            self._update_browse_status()
+
+        self._full_res_loading = path
+        thread = threading.Thread(target=load, daemon=True)
+        thread.start()
+        self._update_browse_status()
+        self.root.after(100, poll)
+
+    def _full_resolution_base(self) -> Image.Image | None:
+        # Browsing shows cached previews; outputs are always rendered from a
+        # fresh full-resolution decode of the same file.
+        if self.base_is_preview and self.base_path:
+            with Image.open(self.base_path) as img:
+                return img.convert("RGBA")
+        return self.base_image
 
     def remove_base_image(self) -> None:
         if not self.base_image:
@@ -420,8 +612,13 @@ class WatermarkApp:
         if confirm:
             self.base_image = None
             self.processed_image = None
-            self.tk_image_ref = None
             self.original_filename = None
+            self.base_path = None
+            self.base_is_preview = False
+            if self.browser:
+                self.browser.close()
+                self.browser = None
+            self._update_browse_status()
             self._draw_canvas_placeholder()
 
     def load_logo(self) -> None:
@@ -440,128 +637,66 @@ class WatermarkApp:
         except Exception as exc:
             messagebox.showerror("Error", f"Failed to load logo:\n{exc}")
 
-    def refresh_preview(self) -> None:
-        if not self.base_image:
+    def detect_invisible(self) -> None:
+        if self._job_running():
             return
 
-        working_image = self.base_image.copy()
-        width, height = working_image.size
-
-        overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-
-        scale_percent = self.size_var.get() / 100.0
-        opacity_value = int((self.opacity_var.get() / 100.0) * 255)
-        padding = int(min(width, height) * 0.03)
-
-        w_obj = 0
-        h_obj = 0
-
-        if self.mode_var.get() == "text":
-            text_str = self.text_content.get()
-            font_size = int(min(width, height) * scale_percent)
-            font_size = max(10, font_size)
-
-            try:
-                if self.font_path:
-                    font = ImageFont.truetype(self.font_path, font_size)
-                else:
-                    try:
-                        font = ImageFont.load_default(size=font_size)
-                    except TypeError:
-                        font = ImageFont.load_default()
-            except OSError:
-                font = ImageFont.load_default()
-
-            try:
-                bbox = draw.textbbox((0, 0), text_str, font=font)
-                w_obj = bbox[2] - bbox[0]
-                h_obj = bbox[3] - bbox[1]
-            except AttributeError:
-                w_obj, h_obj = draw.textsize(text_str, font=font)
-
-            def draw_action(x: int, y: int) -> None:
-                fill_color = self.text_color + (opacity_value,)
-                draw.text((x, y), text_str, font=font, fill=fill_color)
-
-        else:
-            if not self.watermark_logo:
-                self.processed_image = working_image
-                self._update_canvas()
-                return
-
-            target_h = int(min(width, height) * scale_percent)
-            target_h = max(10, target_h)
-
-            aspect_ratio = self.watermark_logo.width / self.watermark_logo.height
-            target_w = int(target_h * aspect_ratio)
+        paths = filedialog.askopenfilenames(
+            filetypes=[("Images", "*.png;*.jpg;*.jpeg;*.bmp")],
+        )
+        if not paths:
+            return
 
-            resized_logo = self.watermark_logo.resize(
-                (target_w, target_h),
-                Image.Resampling.LANCZOS,
-            )
+        self._start_job(lambda: detect_invisible_watermarks(paths), self._show_detection_results)
 
-            r, g, b, a = resized_logo.split()
-            a = a.point(lambda p: p * (opacity_value / 255.0))
-            resized_logo.putalpha(a)
-
-            w_obj = target_w
-            h_obj = target_h
-
-            def draw_action(x: int, y: int) -> None:
-                overlay.paste(resized_logo, (x, y), resized_logo)
-
-        position_choice = self.position_var.get()
-        if position_choice == "Bottom Right":
-            pos_x = width - w_obj - padding
-            pos_y = height - h_obj - padding
-        elif position_choice == "Bottom Left":
-            pos_x = padding
-            pos_y = height - h_obj - padding
-        elif position_choice == "Top Right":
-            pos_x = width - w_obj - padding
-            pos_y = padding
-        elif position_choice == "Top Left":
-            pos_x = padding
-            pos_y = padding
-        else:
-            pos_x = (width - w_obj) // 2
-            pos_y = (height - h_obj) // 2
+    def _show_detection_results(self, results) -> None:
+        lines = []
+        for result in results:
+            name = os.path.basename(result.path)
+            if result.error is not None:
+                lines.append(f"{name}: could not read ({result.error})")
+            elif result.payload is None:
+                lines.append(f"{name}: no watermark found")
+            else:
+                stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(result.payload.timestamp))
+                lines.append(f"{name}: owner {result.payload.owner_id}, {stamp}")
+
+        found = sum(1 for result in results if result.payload is not None)
+        failed = sum(1 for result in results if result.error is not None)
+        summary = f"{found} of {len(results)} images carry a watermark."
+        if failed:
+            summary += f"\n{failed} could not be read."
+        if len(lines) > 20:
+            lines = lines[:20] + [f"... and {len(results) - 20} more"]
+        messagebox.showinfo("Detection Results", summary + "\n\n" + "\n".join(lines))
+
+    def _current_spec(self) -> WatermarkSpec:
+        try:
+            owner_id = int(self.owner_id_var.get())
+        except ValueError:
+            owner_id = 0
+        return WatermarkSpec(
+            mode=self.mode_var.get(),
+            text=self.text_content.get(),
+            color=self.text_color,
+            position=self.position_var.get(),
+            size=self.size_var.get(),
+            opacity=self.opacity_var.get(),
+            font_path=self.font_path,
+            logo=self.watermark_logo,
+            owner_id=owner_id,
+        )
 
-        draw_action(int(pos_x), int(pos_y))
+    def refresh_preview(self) -> None:
+        if not self.base_image:
+            return
 
-        self.processed_image = Image.alpha_composite(working_image, overlay)
+        self.processed_image = apply_watermark(self.base_image, self._current_spec())
         self._update_canvas()
 
     def _update_canvas(self) -> None:
-        if not self.processed_image:
-            return
-
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-
-        if canvas_width < 10 or canvas_height < 10:
-            canvas_width, canvas_height = 800, 600
-
-        img_w, img_h = self.processed_image.size
-        scale = min(canvas_width / img_w, canvas_height / img_h, 1.0)
-
-        display_w = int(img_w * scale)
-        display_h = int(img_h * scale)
-
-        thumbnail = self.processed_image.resize(
-            (display_w, display_h),
-            Image.Resampling.BICUBIC,
-        )
-
-        self.tk_image_ref = ImageTk.PhotoImage(thumbnail)
-        self.canvas.delete("all")
-        self.canvas.create_image(
-            canvas_width // 2,
-            canvas_height // 2,
-            anchor="center",
-            image=self.tk_image_ref,
-        )
+        if self.processed_image:
+            self.view.show(self.processed_image)
 
     def _on_resize_debounced(self, event: tk.Event) -> None:
         if event.widget is self.root:
@@ -587,22 +722,191 @@ class WatermarkApp:
         path = filedialog.asksaveasfilename(
             initialfile=default_name,
             defaultextension=".png",
-            filetypes=[("PNG Image", "*.png"), ("JPEG Image", "*.jpg")],
+            filetypes=[("PNG Image", "*.png"), ("JPEG Image", "*.jpg"), ("WebP Image", "*.webp")],
         )
         if not path:
             return
 
+        target = ENCODE_PRESETS.get(self.encode_preset_var.get())
         try:
+            result = self.processed_image
+            if self.base_is_preview:
+                result = apply_watermark(self._full_resolution_base(), self._current_spec())
             if path.lower().endswith((".jpg", ".jpeg")):
-                bg = Image.new("RGB", self.processed_image.size, (255, 255, 255))
-                bg.paste(self.processed_image, mask=self.processed_image.split()[3])
-                bg.save(path, quality=95)
+                encoded = save_image(result, path, "JPEG", quality=95, target=target)
+            elif path.lower().endswith(".webp"):
+                encoded = save_image(result, path, "WEBP", quality=95, target=target)
             else:
-                self.processed_image.save(path)
-            messagebox.showinfo("Success", "Image saved successfully.")
+                result.save(path)
+                encoded = None
+            if encoded is not None and not encoded.target_met:
+                messagebox.showwarning(
+                    "Target Not Met",
+                    f"Image saved, but \"{self.encode_preset_var.get()}\" could not be reached.\n"
+                    f"Closest quality: {encoded.quality}",
+                )
+                return
+            detail = f"\nQuality: {encoded.quality}" if encoded is not None and target is not None else ""
+            messagebox.showinfo("Success", f"Image saved successfully.{detail}")
         except Exception as exc:
             messagebox.showerror("Error", f"Could not save file:\n{exc}")
 
+    def export_renditions(self) -> None:
+        if not self.base_image:
+            return
+
+        out_dir = filedialog.askdirectory(title="Export Renditions To")
+        if not out_dir:
+            return
+
+        stem = "watermarked_image"
+        if self.original_filename:
+            stem = os.path.splitext(self.original_filename)[0]
+
+        # The encode preset applies to every rendition it can, like Save and Batch.
+        target = ENCODE_PRESETS.get(self.encode_preset_var.get())
+        renditions = [
+            replace(r, target=target) if r.format in ("JPEG", "WEBP") else r
+            for r in DEFAULT_RENDITIONS
+        ]
+        try:
+            paths, skipped, missed = export_renditions(
+                self._full_resolution_base(),
+                self._current_spec(),
+                renditions,
+                out_dir,
+                stem,
+            )
+            message = f"Saved {len(paths)} renditions:\n" + "\n".join(os.path.basename(p) for p in paths)
+            if skipped:
+                widths = ", ".join(f"{r.width} px" for r in skipped)
+                message += f"\n\nSkipped (wider than the source image): {widths}"
+            if missed:
+                names = ", ".join(os.path.basename(p) for p in missed)
+                message += f"\n\nEncode target not met: {names}"
+            messagebox.showinfo("Success", message)
+        except Exception as exc:
+            messagebox.showerror("Error", f"Could not export renditions:\n{exc}")
+
+    def _job_running(self) -> bool:
+        if self._job_thread and self._job_thread.is_alive():
+            messagebox.showinfo("Task Running", "Another task is already in progress.")
+            return True
+        return False
+
+    def _start_job(self, work, on_done) -> None:
+        def run() -> None:
+            try:
+                self._job_outcome = work()
+            except Exception as exc:
+                self._job_outcome = exc
+
+        self._job_outcome = None
+        self._job_done = on_done
+        self._job_thread = threading.Thread(target=run, daemon=True)
+        self._job_thread.start()
+        self.root.config(cursor="watch")
+        self.root.after(200, self._poll_job)
+
+    def _poll_job(self) -> None:
+        if self._job_thread and self._job_thread.is_alive():
+            self.root.after(200, self._poll_job)
+            return
+
+        self.root.config(cursor="")
+        outcome = self._job_outcome
+        self._job_thread = None
+        if isinstance(outcome, Exception):
+            messagebox.showerror("Error", f"Task failed:\n{outcome}")
+        elif outcome is not None:
+            self._job_done(outcome)
+
+    def run_batch(self) -> None:
+        if self._job_running():
+            return
+
+        paths = filedialog.askopenfilenames(
+            title="Select Images to Watermark",
+            filetypes=[("Images", "*.png;*.jpg;*.jpeg;*.bmp")],
+        )
+        if not paths:
+            return
+        out_dir = filedialog.askdirectory(title="Save Watermarked Images To")
+        if not out_dir:
+            return
+
+        spec = self._current_spec()
+        target = ENCODE_PRESETS.get(self.encode_preset_var.get())
+        self._start_job(
+            lambda: watermark_batch_stacked(list(paths), spec, out_dir, target=target),
+            lambda report: messagebox.showinfo("Batch Complete", report.summary()),
+        )
+
+    def run_style_sweep(self) -> None:
+        if self._job_running():
+            return
+
+        initial_dir = os.path.dirname(self.base_path) if self.base_path else None
+        paths = filedialog.askopenfilenames(
+            title=f"Select up to {MAX_SWEEP_SAMPLES} Sample Images",
+            initialdir=initial_dir,
+            filetypes=[("Images", "*.png;*.jpg;*.jpeg;*.bmp")],
+        )
+        if not paths:
+            return
+        if len(paths) > MAX_SWEEP_SAMPLES:
+            messagebox.showinfo(
+                "Style Sweep",
+                f"{len(paths)} images selected; the sweep uses the first {MAX_SWEEP_SAMPLES}.",
+            )
+
+        spec = self._current_spec()
+        self._start_job(
+            lambda: render_contact_sheet(
+                list(paths[:MAX_SWEEP_SAMPLES]),
+                spec,
+                DEFAULT_SWEEP_GRID,
+                font_path=self.font_path,
+            ),
+            self._show_contact_sheet,
+        )
+
+    def _show_contact_sheet(self, sheet: Image.Image) -> None:
+        window = tk.Toplevel(self.root)
+        window.title("Style Sweep")
+        window.geometry("1200x860")
+        window.configure(bg=self.colors["bg_main"])
+
+        # The sheet runs to thousands of pixels a side, so it gets the same
+        # zoomable tile view as the main preview instead of a shrunk copy.
+        canvas = tk.Canvas(window, bg=self.colors["bg_main"], highlightthickness=0)
+        view = TileView(canvas)
+        canvas.bind("<Configure>", lambda e: view.show(sheet))
+
+        def export_sheet() -> None:
+            path = filedialog.asksaveasfilename(
+                parent=window,
+                initialfile="style_sweep.png",
+                defaultextension=".png",
+                filetypes=[("PNG Image", "*.png"), ("JPEG Image", "*.jpg")],
+            )
+            if not path:
+                return
+            try:
+                fmt = "JPEG" if path.lower().endswith((".jpg", ".jpeg")) else "PNG"
+                save_image(sheet, path, fmt, quality=95)
+                messagebox.showinfo("Success", "Contact sheet saved successfully.", parent=window)
+            except Exception as exc:
+                messagebox.showerror("Error", f"Could not save file:\n{exc}", parent=window)
+
+        ttk.Button(
+            window,
+            text="💾 Export Sheet",
+            style="Action.TButton",
+            command=export_sheet,
+        ).pack(side="bottom", fill="x", padx=20, pady=(0, 20), ipady=5)
+        canvas.pack(fill="both", expand=True, padx=20, pady=(20, 10))
+
 if __name__ == "__main__":
     main_window = tk.Tk()
     app = WatermarkApp(main_window)
@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    starved_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+
+    def utilisation(self, wall_seconds: float) -> float:
+        if wall_seconds <= 0:
+            return 0.0
+        return self.busy_seconds / (self.workers * wall_seconds)
+
+
+@dataclass
+class PipelineReport:
+    wall_seconds: float
+    stages: list[StageStats]
+    results: list[Any] = field(default_factory=list)
+    errors: list[tuple[Any, Exception]] = field(default_factory=list)
+    warnings: list[tuple[Any, str]] = field(default_factory=list)
+
+    @property
+    def bottleneck(self) -> StageStats | None:
+        if not self.stages:
+            return None
+        return max(self.stages, key=lambda s: s.utilisation(self.wall_seconds))
+
+    def summary(self) -> str:
+        lines = [f"{len(self.results)} done, {len(self.errors)} failed in {self.wall_seconds:.1f}s"]
+        if self.warnings:
+            lines.append(f"{len(self.warnings)} with warnings, e.g. {self.warnings[0][1]}")
+        for stage in self.stages:
+            lines.append(
+                f"{stage.name}: {stage.workers} workers, "
+                f"{stage.utilisation(self.wall_seconds):.0%} busy, "
+                f"waited {stage.starved_seconds:.1f}s for input, "
+                f"{stage.blocked_seconds:.1f}s on output"
+            )
+        if self.bottleneck is not None:
+            lines.append(f"Bottleneck: {self.bottleneck.name}")
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+
+
+class Pipeline:
+    def __init__(self, stages: list[Stage], queue_size: int = 4) -> None:
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, items: Iterable[Any]) -> PipelineReport:
+        # One bounded queue in front of every stage plus one for the results.
+        # A full queue blocks the stage feeding it, which caps how many decoded
+        # images can be in flight at once.
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        queues.append(queue.Queue())
+        stats = [StageStats(stage.name, stage.workers) for stage in self.stages]
+        errors: list[tuple[Any, Exception]] = []
+        lock = threading.Lock()
+        remaining = [stage.workers for stage in self.stages]
+
+        def worker(index: int) -> None:
+            stage = self.stages[index]
+            inbox, outbox = queues[index], queues[index + 1]
+            stage_stats = stats[index]
+            downstream = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+
+            while True:
+                waited = time.perf_counter()
+                item = inbox.get()
+                started = time.perf_counter()
+                if item is _DONE:
+                    with lock:
+                        stage_stats.starved_seconds += started - waited
+                        remaining[index] -= 1
+                        last = remaining[index] == 0
+                    if last:
+                        for _ in range(downstream):
+                            outbox.put(_DONE)
+                    return
+
+                try:
+                    result = stage.func(item)
+                    failed = None
+                except Exception as exc:
+                    failed = exc
+                finished = time.perf_counter()
+
+                if failed is None:
+                    outbox.put(result)
+                blocked = time.perf_counter() - finished
+
+                with lock:
+                    stage_stats.starved_seconds += started - waited
+                    stage_stats.busy_seconds += finished - started
+                    stage_stats.blocked_seconds += blocked
+                    if failed is None:
+                        stage_stats.items += 1
+                    else:
+                        stage_stats.errors += 1
+                        errors.append((item, failed))
+
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=worker, args=(index,), daemon=True)
+            for index, stage in enumerate(self.stages)
+            for _ in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        for item in items:
+            queues[0].put(item)
+        for _ in range(self.stages[0].workers):
+            queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+
+        results = []
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            results.append(item)
+        return PipelineReport(wall, stats, results, errors)
@@ -0,0 +1,70 @@
+from PIL import Image
+
+
+class ImagePyramid:
+    def __init__(self, image: Image.Image, tile_size: int = 256) -> None:
+        self.source = image
+        self.tile_size = tile_size
+        self._levels: dict[int, Image.Image] = {0: image}
+
+        max_level = 0
+        while (max(image.size) >> max_level > tile_size
+               and min(image.size) >> (max_level + 1) >= 1):
+            max_level += 1
+        self.max_level = max_level
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.source.size
+
+    def level_for(self, zoom: float) -> int:
+        level = 0
+        while level < self.max_level and 2.0 ** -(level + 1) >= zoom:
+            level += 1
+        return level
+
+    def level(self, index: int) -> Image.Image:
+        cached = self._levels.get(index)
+        if cached is not None:
+            return cached
+
+        # Reduce from the closest finer level that already exists so each
+        # level is derived in a single pass without building the ones between.
+        finer = max(k for k in self._levels if k < index)
+        image = self._levels[finer].reduce(2 ** (index - finer))
+        self._levels[index] = image
+        return image
+
+    def display_size(self, index: int, scale: float) -> tuple[int, int]:
+        image = self.level(index)
+        return max(1, int(image.width * scale)), max(1, int(image.height * scale))
+
+    def grid(self, index: int, scale: float) -> tuple[int, int]:
+        display_w, display_h = self.display_size(index, scale)
+        cols = -(-display_w // self.tile_size)
+        rows = -(-display_h // self.tile_size)
+        return cols, rows
+
+    def render_tile(self, index: int, tx: int, ty: int, scale: float) -> Image.Image:
+        # Tiles live in screen space: each one is at most tile_size square on
+        # the canvas, and covers tile_size / scale pixels of the level. High
+        # zoom therefore crops less source rather than producing huge tiles.
+        image = self.level(index)
+        ts = self.tile_size
+        display_w, display_h = self.display_size(index, scale)
+
+        left, top = tx * ts, ty * ts
+        out_w = min(ts, display_w - left)
+        out_h = min(ts, display_h - top)
+
+        box = (
+            left / scale,
+            top / scale,
+            min(image.width, (left + out_w) / scale),
+            min(image.height, (top + out_h) / scale),
+        )
+        if scale == 1.0:
+            return image.crop(tuple(int(v) for v in box))
+
+        resample = Image.Resampling.NEAREST if scale > 1.0 else Image.Resampling.BICUBIC
+        return image.resize((out_w, out_h), resample, box=box)
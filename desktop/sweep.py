@@ -0,0 +1,144 @@
+import itertools
+import math
+from dataclasses import replace
+
+from PIL import Image, ImageDraw
+
+from browser import decode_preview
+from watermark import (
+    POSITIONS,
+    WatermarkSpec,
+    apply_watermark,
+    composite_stamp,
+    load_font,
+    place_stamp,
+    rasterise_stamp,
+)
+
+DEFAULT_SWEEP_GRID: dict[str, list] = {
+    "position": POSITIONS,
+    "size": [3.0, 5.0, 8.0, 12.0, 16.0],
+    "opacity": [40.0, 60.0, 75.0, 90.0, 100.0],
+}
+
+MAX_SWEEP_SAMPLES = 4
+
+SHORT_POSITIONS = {
+    "Bottom Right": "BR",
+    "Bottom Left": "BL",
+    "Top Right": "TR",
+    "Top Left": "TL",
+    "Center": "C",
+}
+
+
+def sweep_specs(base: WatermarkSpec, grid: dict[str, list]) -> list[WatermarkSpec]:
+    fields = list(grid)
+    return [
+        replace(base, **dict(zip(fields, values)))
+        for values in itertools.product(*(grid[name] for name in fields))
+    ]
+
+
+def sweep_label(spec: WatermarkSpec, grid: dict[str, list]) -> str:
+    parts = []
+    for name in grid:
+        value = getattr(spec, name)
+        if name == "position":
+            parts.append(SHORT_POSITIONS.get(value, str(value)))
+        elif isinstance(value, float):
+            parts.append(f"{name[:2]} {value:g}%")
+        else:
+            parts.append(f"{name[:2]} {value}")
+    return " · ".join(parts)
+
+
+def render_sweep(
+    sources: list[str],
+    base: WatermarkSpec,
+    grid: dict[str, list],
+    thumb_size: int = 200,
+) -> list[tuple[WatermarkSpec, list[Image.Image]]]:
+    # Every source is decoded once, straight to thumbnail resolution; the
+    # full size only needs the header.
+    thumbs = [decode_preview(path, thumb_size) for path in sources]
+    full_sizes = []
+    for path in sources:
+        with Image.open(path) as img:
+            full_sizes.append(img.size)
+
+    rasters: dict[tuple, tuple | None] = {}
+
+    def scaled_raster(spec: WatermarkSpec, full_size: tuple[int, int], thumb: Image.Image) -> tuple | None:
+        # Rasterise at the source's real size and shrink, so the thumbnail
+        # shows the proportions (and font-size floor) of the final output.
+        # Position only moves the stamp, so a position sweep reuses the raster.
+        key = spec.stamp_key() + (min(full_size), thumb.size)
+        if key not in rasters:
+            raster = rasterise_stamp(spec, full_size)
+            if raster is not None:
+                ratio = thumb.width / full_size[0]
+                stamp, (off_x, off_y), (ink_w, ink_h) = raster
+                stamp = stamp.resize(
+                    (max(1, round(stamp.width * ratio)), max(1, round(stamp.height * ratio))),
+                    Image.Resampling.LANCZOS,
+                )
+                raster = (stamp, (round(off_x * ratio), round(off_y * ratio)),
+                          (round(ink_w * ratio), round(ink_h * ratio)))
+            rasters[key] = raster
+        return rasters[key]
+
+    rows: list[tuple[WatermarkSpec, list[Image.Image]]] = []
+    for spec in sweep_specs(base, grid):
+        cells = []
+        for thumb, full_size in zip(thumbs, full_sizes):
+            if spec.mode == "invisible":
+                cells.append(apply_watermark(thumb, spec))
+                continue
+
+            raster = scaled_raster(spec, full_size, thumb)
+            if raster is None:
+                cells.append(thumb)
+                continue
+
+            stamp, offset, ink_size = raster
+            position = place_stamp(spec.position, thumb.size, offset, ink_size)
+            cells.append(composite_stamp(thumb, stamp, position))
+        rows.append((spec, cells))
+    return rows
+
+
+def render_contact_sheet(
+    sources: list[str],
+    base: WatermarkSpec,
+    grid: dict[str, list] | None = None,
+    thumb_size: int = 200,
+    font_path: str | None = None,
+) -> Image.Image:
+    grid = grid or DEFAULT_SWEEP_GRID
+    rows = render_sweep(sources, base, grid, thumb_size)
+
+    gap = 8
+    label_h = 22
+    group_w = len(sources) * (thumb_size + gap) - gap
+    group_h = thumb_size + label_h
+    cols = max(1, math.ceil(math.sqrt(len(rows) * group_h / group_w)))
+    grid_rows = math.ceil(len(rows) / cols)
+
+    sheet = Image.new(
+        "RGB",
+        (cols * (group_w + gap * 2) + gap * 2, grid_rows * (group_h + gap * 2) + gap * 2),
+        (30, 30, 30),
+    )
+    draw = ImageDraw.Draw(sheet)
+    font = load_font(font_path, 12)
+
+    for index, (spec, cells) in enumerate(rows):
+        gx = gap * 2 + (index % cols) * (group_w + gap * 2)
+        gy = gap * 2 + (index // cols) * (group_h + gap * 2)
+        for n, cell in enumerate(cells):
+            cx = gx + n * (thumb_size + gap) + (thumb_size - cell.width) // 2
+            cy = gy + (thumb_size - cell.height) // 2
+            sheet.paste(cell.convert("RGB"), (cx, cy))
+        draw.text((gx, gy + thumb_size + 4), sweep_label(spec, grid), font=font, fill=(200, 200, 200))
+    return sheet
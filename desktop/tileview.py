@@ -0,0 +1,206 @@
+import tkinter as tk
+from collections import OrderedDict
+from typing import Callable
+
+from PIL import Image, ImageTk
+
+from pyramid import ImagePyramid
+
+ZOOM_STEP = 1.25
+MAX_ZOOM = 8.0
+TILE_CACHE_BYTES = 128 * 1024 * 1024
+
+
+class TileView:
+    def __init__(
+        self,
+        canvas: tk.Canvas,
+        cache_bytes: int = TILE_CACHE_BYTES,
+        on_zoom: Callable[[float], None] | None = None,
+    ) -> None:
+        self.canvas = canvas
+        self.cache_bytes = cache_bytes
+        self.on_zoom = on_zoom
+        self.pyramid: ImagePyramid | None = None
+        self._zoom: float = 1.0
+        self._fit_view: bool = True
+        self._view_origin: tuple[int, int] = (0, 0)
+        self._drag_anchor: tuple[int, int] | None = None
+        self._tile_items: dict[tuple, tuple[int, ImageTk.PhotoImage]] = {}
+        self._tile_cache: OrderedDict[tuple, ImageTk.PhotoImage] = OrderedDict()
+        self._tile_cache_bytes = 0
+
+        self.canvas.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.canvas.bind("<Button-4>", self._on_mouse_wheel)
+        self.canvas.bind("<Button-5>", self._on_mouse_wheel)
+        self.canvas.bind("<ButtonPress-1>", self._on_pan_start)
+        self.canvas.bind("<B1-Motion>", self._on_pan_move)
+        self.canvas.bind("<ButtonRelease-1>", self._on_pan_end)
+        self.canvas.bind("<Double-Button-1>", lambda e: self.reset_view())
+
+    def show(self, image: Image.Image, keep_view: bool = False) -> None:
+        # keep_view swaps in a different resolution of the same picture and
+        # rescales the zoom so the same part stays on screen.
+        if self.pyramid is None or self.pyramid.source is not image:
+            same_size = self.pyramid is not None and self.pyramid.size == image.size
+            if keep_view and self.pyramid is not None and not same_size:
+                self._zoom *= self.pyramid.size[0] / image.width
+                same_size = True
+            self.pyramid = ImagePyramid(image)
+            self._tile_cache.clear()
+            self._tile_cache_bytes = 0
+            for item, _ in self._tile_items.values():
+                self.canvas.delete(item)
+            self._tile_items.clear()
+            if not same_size:
+                self._fit_view = True
+
+        if not self._tile_items:
+            self.canvas.delete("all")
+
+        if self._fit_view:
+            self._zoom = self._fit_zoom()
+
+        self._clamp_view()
+        self._render_tiles()
+
+    def clear(self) -> None:
+        for item, _ in self._tile_items.values():
+            self.canvas.delete(item)
+        self._tile_items.clear()
+        self._tile_cache.clear()
+        self._tile_cache_bytes = 0
+        self.pyramid = None
+        self._fit_view = True
+
+    def reset_view(self) -> None:
+        if not self.pyramid:
+            return
+        self._fit_view = True
+        self.show(self.pyramid.source)
+
+    def _canvas_size(self) -> tuple[int, int]:
+        canvas_width = self.canvas.winfo_width()
+        canvas_height = self.canvas.winfo_height()
+
+        if canvas_width < 10 or canvas_height < 10:
+            canvas_width, canvas_height = 800, 600
+        return canvas_width, canvas_height
+
+    def _fit_zoom(self) -> float:
+        canvas_width, canvas_height = self._canvas_size()
+        img_w, img_h = self.pyramid.size
+        return min(canvas_width / img_w, canvas_height / img_h, 1.0)
+
+    def _clamp_view(self) -> None:
+        canvas_width, canvas_height = self._canvas_size()
+        img_w, img_h = self.pyramid.size
+        display_w = int(img_w * self._zoom)
+        display_h = int(img_h * self._zoom)
+
+        ox, oy = self._view_origin
+        if display_w <= canvas_width:
+            ox = (canvas_width - display_w) // 2
+        else:
+            ox = min(0, max(canvas_width - display_w, ox))
+        if display_h <= canvas_height:
+            oy = (canvas_height - display_h) // 2
+        else:
+            oy = min(0, max(canvas_height - display_h, oy))
+        self._view_origin = (int(ox), int(oy))
+
+    def _tile_photo(self, key: tuple, level: int, tx: int, ty: int, scale: float) -> ImageTk.PhotoImage:
+        photo = self._tile_cache.get(key)
+        if photo is not None:
+            self._tile_cache.move_to_end(key)
+            return photo
+
+        tile = self.pyramid.render_tile(level, tx, ty, scale)
+        photo = ImageTk.PhotoImage(tile)
+        self._tile_cache[key] = photo
+        self._tile_cache_bytes += tile.width * tile.height * 4
+        while self._tile_cache_bytes > self.cache_bytes and len(self._tile_cache) > 1:
+            _, evicted = self._tile_cache.popitem(last=False)
+            self._tile_cache_bytes -= evicted.width() * evicted.height() * 4
+        return photo
+
+    def _render_tiles(self) -> None:
+        canvas_width, canvas_height = self._canvas_size()
+        level = self.pyramid.level_for(self._zoom)
+        scale = self._zoom * (2 ** level)
+        if abs(scale - 1.0) < 1e-6:
+            scale = 1.0
+        step = self.pyramid.tile_size
+        cols, rows = self.pyramid.grid(level, scale)
+        ox, oy = self._view_origin
+
+        first_col = max(0, int(-ox // step))
+        last_col = min(cols - 1, int((canvas_width - ox) // step))
+        first_row = max(0, int(-oy // step))
+        last_row = min(rows - 1, int((canvas_height - oy) // step))
+
+        visible: dict[tuple, tuple[int, ImageTk.PhotoImage]] = {}
+        for ty in range(first_row, last_row + 1):
+            for tx in range(first_col, last_col + 1):
+                key = (level, round(scale, 6), tx, ty)
+                x = ox + tx * step
+                y = oy + ty * step
+
+                current = self._tile_items.pop(key, None)
+                if current is not None:
+                    self.canvas.coords(current[0], x, y)
+                    visible[key] = current
+                    continue
+
+                photo = self._tile_photo(key, level, tx, ty, scale)
+                item = self.canvas.create_image(x, y, anchor="nw", image=photo, tags="tile")
+                visible[key] = (item, photo)
+
+        for item, _ in self._tile_items.values():
+            self.canvas.delete(item)
+        self._tile_items = visible
+
+    def _zoom_at(self, factor: float, x: int, y: int) -> None:
+        if not self.pyramid:
+            return
+
+        fit_zoom = self._fit_zoom()
+        new_zoom = min(MAX_ZOOM, max(fit_zoom, self._zoom * factor))
+        if new_zoom == self._zoom:
+            return
+
+        ox, oy = self._view_origin
+        img_x = (x - ox) / self._zoom
+        img_y = (y - oy) / self._zoom
+        self._view_origin = (int(x - img_x * new_zoom), int(y - img_y * new_zoom))
+        self._zoom = new_zoom
+        self._fit_view = new_zoom <= fit_zoom
+
+        self._clamp_view()
+        self._render_tiles()
+        if self.on_zoom:
+            self.on_zoom(new_zoom)
+
+    def _on_mouse_wheel(self, event: tk.Event) -> None:
+        if event.num == 4 or event.delta > 0:
+            self._zoom_at(ZOOM_STEP, event.x, event.y)
+        elif event.num == 5 or event.delta < 0:
+            self._zoom_at(1 / ZOOM_STEP, event.x, event.y)
+
+    def _on_pan_start(self, event: tk.Event) -> None:
+        self._drag_anchor = (event.x, event.y)
+
+    def _on_pan_move(self, event: tk.Event) -> None:
+        if not self.pyramid or self._drag_anchor is None:
+            return
+
+        ax, ay = self._drag_anchor
+        ox, oy = self._view_origin
+        self._view_origin = (ox + event.x - ax, oy + event.y - ay)
+        self._drag_anchor = (event.x, event.y)
+
+        self._clamp_view()
+        self._render_tiles()
+
+    def _on_pan_end(self, event: tk.Event) -> None:
+        self._drag_anchor = None
@@ -0,0 +1,146 @@
+import time
+from dataclasses import dataclass, field
+
+from PIL import Image, ImageDraw, ImageFont
+
+from invisible import WatermarkPayload, embed_invisible_watermark
+
+POSITIONS = ["Bottom Right", "Bottom Left", "Top Right", "Top Left", "Center"]
+
+
+@dataclass(frozen=True)
+class WatermarkSpec:
+    mode: str = "text"
+    text: str = "© Copyright"
+    color: tuple[int, int, int] = (255, 255, 255)
+    position: str = "Bottom Right"
+    size: float = 5.0
+    opacity: float = 90.0
+    font_path: str | None = None
+    logo: Image.Image | None = field(default=None, compare=False, repr=False)
+    owner_id: int = 0
+
+    def stamp_key(self) -> tuple:
+        # Everything that changes the rasterised stamp; position only moves it.
+        return (self.mode, self.text, self.color, self.size, self.opacity,
+                self.font_path, id(self.logo), self.owner_id)
+
+
+def load_font(font_path: str | None, font_size: int) -> ImageFont.ImageFont:
+    try:
+        if font_path:
+            return ImageFont.truetype(font_path, font_size)
+        try:
+            return ImageFont.load_default(size=font_size)
+        except TypeError:
+            return ImageFont.load_default()
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _text_stamp(spec: WatermarkSpec, short_side: int) -> tuple[Image.Image, tuple[int, int], tuple[int, int]]:
+    font_size = max(10, int(short_side * spec.size / 100.0))
+    font = load_font(spec.font_path, font_size)
+    opacity_value = int((spec.opacity / 100.0) * 255)
+
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    try:
+        bbox = measure.textbbox((0, 0), spec.text, font=font)
+    except AttributeError:
+        bbox = (0, 0) + tuple(measure.textsize(spec.text, font=font))
+
+    # Positions are computed from the ink box, but the text is drawn from its
+    # origin, so keep the origin inside the stamp and report where it sits.
+    left, top = min(0, bbox[0]), min(0, bbox[1])
+    stamp = Image.new("RGBA", (max(1, bbox[2] - left), max(1, bbox[3] - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(stamp).text(
+        (-left, -top), spec.text, font=font, fill=spec.color + (opacity_value,)
+    )
+    return stamp, (left, top), (bbox[2] - bbox[0], bbox[3] - bbox[1])
+
+
+def _logo_stamp(spec: WatermarkSpec, short_side: int) -> tuple[Image.Image, tuple[int, int], tuple[int, int]]:
+    opacity_value = int((spec.opacity / 100.0) * 255)
+    target_h = max(10, int(short_side * spec.size / 100.0))
+    aspect_ratio = spec.logo.width / spec.logo.height
+    target_w = int(target_h * aspect_ratio)
+
+    resized_logo = spec.logo.resize((target_w, target_h), Image.Resampling.LANCZOS)
+    r, g, b, a = resized_logo.split()
+    a = a.point(lambda p: p * (opacity_value / 255.0))
+    resized_logo.putalpha(a)
+
+    stamp = Image.new("RGBA", resized_logo.size, (0, 0, 0, 0))
+    stamp.paste(resized_logo, (0, 0), resized_logo)
+    return stamp, (0, 0), (target_w, target_h)
+
+
+def rasterise_stamp(
+    spec: WatermarkSpec, size: tuple[int, int]
+) -> tuple[Image.Image, tuple[int, int], tuple[int, int]] | None:
+    short_side = min(size)
+    if spec.mode == "text":
+        return _text_stamp(spec, short_side)
+    if spec.mode == "logo" and spec.logo is not None:
+        return _logo_stamp(spec, short_side)
+    return None
+
+
+def place_stamp(
+    position: str,
+    size: tuple[int, int],
+    offset: tuple[int, int],
+    ink_size: tuple[int, int],
+) -> tuple[int, int]:
+    width, height = size
+    w_obj, h_obj = ink_size
+    padding = int(min(width, height) * 0.03)
+    if position == "Bottom Right":
+        pos_x = width - w_obj - padding
+        pos_y = height - h_obj - padding
+    elif position == "Bottom Left":
+        pos_x = padding
+        pos_y = height - h_obj - padding
+    elif position == "Top Right":
+        pos_x = width - w_obj - padding
+        pos_y = padding
+    elif position == "Top Left":
+        pos_x = padding
+        pos_y = padding
+    else:
+        pos_x = (width - w_obj) // 2
+        pos_y = (height - h_obj) // 2
+
+    return int(pos_x) + offset[0], int(pos_y) + offset[1]
+
+
+def render_stamp(spec: WatermarkSpec, size: tuple[int, int]) -> tuple[Image.Image, tuple[int, int]] | None:
+    raster = rasterise_stamp(spec, size)
+    if raster is None:
+        return None
+    stamp, offset, ink_size = raster
+    return stamp, place_stamp(spec.position, size, offset, ink_size)
+
+
+def composite_stamp(image: Image.Image, stamp: Image.Image, position: tuple[int, int]) -> Image.Image:
+    result = image.copy()
+    x, y = position
+    # alpha_composite refuses negative destinations, so clip the stamp to the
+    # image first.
+    left, top = max(0, -x), max(0, -y)
+    right = min(stamp.width, image.width - x)
+    bottom = min(stamp.height, image.height - y)
+    if right > left and bottom > top:
+        result.alpha_composite(stamp.crop((left, top, right, bottom)), (x + left, y + top))
+    return result
+
+
+def apply_watermark(image: Image.Image, spec: WatermarkSpec) -> Image.Image:
+    if spec.mode == "invisible":
+        payload = WatermarkPayload(spec.owner_id, int(time.time()))
+        return embed_invisible_watermark(image, payload)
+
+    placed = render_stamp(spec, image.size)
+    if placed is None:
+        return image.copy()
+    return composite_stamp(image, *placed)
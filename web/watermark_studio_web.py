@@ -1,6 +1,7 @@
 import streamlit as st
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageChops, ImageDraw, ImageFont
 import io
+import math
 import os
 import base64
 
@@ -82,6 +83,79 @@ def get_font(size):
             return ImageFont.truetype(p, size)
     return ImageFont.load_default()
 
+EXPORT_PRESETS = {
+    "Fixed quality (95)": None,
+    "High fidelity (PSNR 40 dB)": ("psnr", 40.0),
+    "Web (max 500 KB)": ("bytes", 500_000),
+    "Thumbnail (max 150 KB)": ("bytes", 150_000),
+}
+
+def encode_jpeg(img, quality):
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+def jpeg_psnr(img, data):
+    decoded = Image.open(io.BytesIO(data)).convert("RGB")
+    hist = ImageChops.difference(img, decoded).histogram()
+    sq = sum(count * (i % 256) ** 2 for i, count in enumerate(hist))
+    mse = sq / (img.width * img.height * 3)
+    return float("inf") if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+
+def first_passing(lo, hi, ok):
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if ok(mid):
+            hi = mid - 1
+        else:
+            lo = mid + 1
+    return lo
+
+def encode_to_target(img, preset, window=6):
+    if preset is None:
+        return encode_jpeg(img, 95), 95, True
+
+    kind, limit = preset
+    cache = {}
+
+    def full(q):
+        if q not in cache:
+            cache[q] = encode_jpeg(img, q)
+        return cache[q]
+
+    shrink = min(1.0, 512 / max(img.size))
+    probe = img.resize((max(1, int(img.width * shrink)), max(1, int(img.height * shrink))), Image.Resampling.BOX)
+
+    if kind == "psnr":
+        def probe_ok(q): return jpeg_psnr(probe, encode_jpeg(probe, q)) >= limit
+        def full_ok(q): return jpeg_psnr(img, full(q)) >= limit
+    else:
+        budget = limit * (probe.width * probe.height) / (img.width * img.height)
+        def probe_ok(q): return len(encode_jpeg(probe, q)) > budget
+        def full_ok(q): return len(full(q)) > limit
+
+    # Narrow on the small probe, then confirm inside a short window at full size.
+    est = first_passing(1, 100, probe_ok)
+    lo, hi = max(1, est - window), min(100, est + window)
+    if lo > 1 and full_ok(lo):
+        q = first_passing(1, lo - 1, full_ok)
+    elif hi < 100 and not full_ok(hi):
+        q = first_passing(hi + 1, 100, full_ok)
+    else:
+        q = first_passing(lo, hi, full_ok)
+
+    # An unreachable target still returns the closest quality, flagged unmet.
+    met = q <= 100 if kind == "psnr" else q > 1
+    q = min(100, q) if kind == "psnr" else max(1, q - 1)
+    return full(q), q, met
+
+# Streamlit reruns the whole script on every widget change, so the search is
+# keyed on the rendered pixels and the preset and only rerun when they change.
+@st.cache_data(max_entries=8, show_spinner="Choosing export quality...")
+def cached_export(pixels, size, preset_name):
+    img = Image.frombytes("RGB", size, pixels)
+    return encode_to_target(img, EXPORT_PRESETS[preset_name])
+
 def reset_defaults():
     st.session_state.size = 5
     st.session_state.opacity = 85
@@ -95,6 +169,7 @@ defaults = {
     "text": "© Copyright",
     "color": "#FFFFFF",
     "color_draft": "#FFFFFF",
+    "export_preset": "Fixed quality (95)",
 }
 for k, v in defaults.items():
     st.session_state.setdefault(k, v)
@@ -208,9 +283,13 @@ with st.sidebar:
     if src:
         st.markdown("<div style='margin-top:24px;'></div>", unsafe_allow_html=True)
         preview = apply_watermark(Image.open(src), logo_img if st.session_state.mode == "Logo" else None)
-        buf = io.BytesIO()
-        preview.convert("RGB").save(buf, format="JPEG", quality=95)
-        st.download_button("💾 EXPORT IMAGE", buf.getvalue(), "watermarked.jpg", "image/jpeg")
+        st.session_state.export_preset = st.selectbox("EXPORT QUALITY", list(EXPORT_PRESETS))
+        rgb = preview.convert("RGB")
+        data, quality, met = cached_export(rgb.tobytes(), rgb.size, st.session_state.export_preset)
+        st.caption(f"JPEG quality {quality} · {len(data) // 1024} KB")
+        if not met:
+            st.warning("This target can't be reached for this image; exporting the closest quality.")
+        st.download_button("💾 EXPORT IMAGE", data, "watermarked.jpg", "image/jpeg")
 
 if src:
     final_img = apply_watermark(Image.open(src), logo_img if st.session_state.mode == "Logo" else None)